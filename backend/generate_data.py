@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Generador de datos sintéticos para pruebas de rendimiento del sistema de reservas
+
+Produce hoteles con trabajadores, clientes, habitaciones y reservas con la misma
+forma que los documentos que escribe server.py. La salida es reproducible para
+una misma semilla y puede guardarse como fixtures JSONL y/o cargarse en MongoDB.
+
+Ejemplos:
+    python generate_data.py --hotels 10 --scale 100 --output fixtures/
+    python generate_data.py --hotels 50 --mongo-url mongodb://localhost:27017/
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import bcrypt
+import pymongo
+from bson import json_util
+
+ROOM_TYPES = [
+    # (room_type, price_per_night, capacity, description, weight)
+    ('Simple', 50.0, 2, 'Habitación simple con cama matrimonial', 5),
+    ('Doble', 80.0, 4, 'Habitación doble con dos camas', 4),
+    ('Suite', 150.0, 6, 'Suite de lujo con jacuzzi', 1),
+]
+
+FIRST_NAMES = ['Ana', 'Luis', 'María', 'Carlos', 'Lucía', 'Jorge', 'Sofía', 'Pedro', 'Elena', 'Miguel',
+               'Laura', 'Diego', 'Carmen', 'Andrés', 'Paula', 'Javier', 'Valeria', 'Raúl', 'Isabel', 'Tomás']
+LAST_NAMES = ['García', 'Rodríguez', 'López', 'Martínez', 'Sánchez', 'Pérez', 'Gómez', 'Díaz', 'Torres',
+              'Ramírez', 'Flores', 'Vargas', 'Castro', 'Romero', 'Herrera', 'Medina', 'Ruiz', 'Moreno']
+
+# Relative weight of each stay length in nights; short stays dominate
+STAY_LENGTH_WEIGHTS = {1: 20, 2: 25, 3: 18, 4: 10, 5: 8, 6: 5, 7: 7, 10: 3, 14: 4}
+# Relative weight of check-ins per month (January first); summer and December peak
+MONTH_WEIGHTS = [6, 5, 7, 8, 8, 10, 14, 15, 9, 7, 6, 11]
+
+COLLECTIONS = ['hotels', 'workers', 'clients', 'rooms', 'reservations']
+
+BCRYPT_ALPHABET = './ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+
+
+def seeded_password_hash(password: str, seed: int) -> str:
+    """Hash the workers' password with a salt derived from the seed so fixtures are reproducible"""
+    rng = random.Random(f"password-{seed}")
+    # 22 base64 characters encode the 16-byte salt; the last one only carries
+    # 2 bits, so it must be one of the characters whose low bits are zero
+    salt = ''.join(rng.choice(BCRYPT_ALPHABET) for _ in range(21)) + rng.choice('.Oeu')
+    return bcrypt.hashpw(password.encode('utf-8'), f"$2b$12${salt}".encode('utf-8')).decode('utf-8')
+
+
+def hotel_name(hotel_id: int) -> str:
+    return f"Hotel Sintético {hotel_id}"
+
+
+def hotel_email(prefix: str, hotel_id: int) -> str:
+    return f"{prefix}@hotel{hotel_id}.example.com"
+
+
+class DataGenerator:
+    """Genera los documentos de cada hotel de forma determinista a partir de una semilla"""
+
+    def __init__(self, args, password_hash: str):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.password_hash = password_hash
+        self.base_date = datetime.strptime(args.base_date, "%Y-%m-%d")
+        self.stay_lengths = list(STAY_LENGTH_WEIGHTS)
+        self.stay_weights = list(STAY_LENGTH_WEIGHTS.values())
+
+    def new_id(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def person_name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def random_datetime(self, start: datetime, end: datetime) -> datetime:
+        seconds = int((end - start).total_seconds())
+        return start + timedelta(seconds=self.rng.randint(0, max(seconds, 0)))
+
+    def check_in_date(self) -> datetime:
+        # Pick a month by seasonal weight, then a day; Fridays and Saturdays
+        # are twice as likely as other days
+        window_start = self.base_date - timedelta(days=self.args.history_days)
+        total_days = self.args.history_days + self.args.future_days
+        while True:
+            day = window_start + timedelta(days=self.rng.randrange(total_days))
+            weight = MONTH_WEIGHTS[day.month - 1] / max(MONTH_WEIGHTS)
+            if day.weekday() in (4, 5):
+                weight *= 2
+            if self.rng.random() < weight / 2:
+                return day
+
+    def hotel(self, hotel_id: int) -> dict:
+        args = self.args
+        created_at = self.base_date - timedelta(days=args.history_days + 30)
+        docs = {name: [] for name in COLLECTIONS}
+
+        docs['hotels'].append({
+            'hotel_id': hotel_id,
+            'name': hotel_name(hotel_id),
+            'created_at': created_at
+        })
+
+        for index in range(args.workers):
+            docs['workers'].append({
+                'worker_id': self.new_id(),
+                'email': hotel_email(f"trabajador{index}", hotel_id),
+                'password': self.password_hash,
+                'name': self.person_name(),
+                'phone': f"+34 6{self.rng.randrange(10 ** 8):08d}",
+                'hotel_id': hotel_id,
+                'hotel_name': hotel_name(hotel_id),
+                'created_at': created_at
+            })
+        worker_ids = [worker['worker_id'] for worker in docs['workers']]
+
+        floors = max(1, (args.rooms + 19) // 20)
+        for index in range(args.rooms):
+            room_type, price, capacity, description, _ = self.rng.choices(
+                ROOM_TYPES, weights=[room[4] for room in ROOM_TYPES]
+            )[0]
+            docs['rooms'].append({
+                'room_id': self.new_id(),
+                'room_number': f"{index % floors + 1}{index // floors + 1:02d}",
+                'room_type': room_type,
+                'price_per_night': price,
+                'capacity': capacity,
+                'description': description,
+                'hotel_id': hotel_id,
+                'hotel_name': hotel_name(hotel_id),
+                'is_available': True,
+                'created_at': created_at
+            })
+
+        for index in range(args.clients):
+            name = self.person_name()
+            docs['clients'].append({
+                'client_id': self.new_id(),
+                'name': name,
+                'email': hotel_email(f"cliente{index}", hotel_id),
+                'phone': f"+34 6{self.rng.randrange(10 ** 8):08d}",
+                'identification': f"{self.rng.randrange(10 ** 8):08d}{self.rng.choice('TRWAGMYFPDXBNJZSQVHLCKE')}",
+                'hotel_id': hotel_id,
+                'hotel_name': hotel_name(hotel_id),
+                'created_by': self.rng.choice(worker_ids),
+                'created_at': self.random_datetime(created_at, self.base_date)
+            })
+
+        if docs['clients'] and docs['rooms']:
+            per_room = [0] * len(docs['rooms'])
+            for _ in range(args.reservations):
+                per_room[self.rng.randrange(len(docs['rooms']))] += 1
+            for room, count in zip(docs['rooms'], per_room):
+                docs['reservations'].extend(
+                    self.room_reservations(hotel_id, room, count, docs['clients'], worker_ids, created_at)
+                )
+
+        # A client is registered shortly before their first booking
+        first_booking = {}
+        for reservation in docs['reservations']:
+            client_id = reservation['client_id']
+            first_booking[client_id] = min(first_booking.get(client_id, reservation['created_at']),
+                                           reservation['created_at'])
+        for client in docs['clients']:
+            if client['client_id'] in first_booking:
+                booked_at = first_booking[client['client_id']]
+                client['created_at'] = self.random_datetime(max(created_at, booked_at - timedelta(days=30)), booked_at)
+
+        return docs
+
+    def room_reservations(self, hotel_id: int, room: dict, count: int, clients: list, worker_ids: list,
+                          opened_at: datetime) -> list:
+        """Build a room's bookings in the order server.py allows them.
+
+        create_reservation locks the room from booking until
+        cancel_reservation frees it, so each booking is created only after
+        the previous one ended, and stays never overlap. Ending a stay goes
+        through cancel_reservation too: checked-out stays are 'cancelled'
+        with cancelled_at at check-out, while real cancellations happen
+        before check-in (cancelled_at < check_in_date). The first stay still
+        running at the base date is active; no later booking could have
+        been made, so the room's remaining bookings are not generated.
+        """
+        reservations = []
+        free_since = opened_at
+        for check_in in sorted(self.check_in_date() for _ in range(count)):
+            if check_in < free_since:
+                # Next midnight once the room is free again
+                check_in = datetime.combine(free_since.date(), datetime.min.time())
+                if check_in < free_since:
+                    check_in += timedelta(days=1)
+            reservation = self.reservation(hotel_id, room, check_in, self.rng.choice(clients), worker_ids, free_since)
+            reservations.append(reservation)
+            check_out = reservation['check_out_date']
+
+            if self.rng.random() < self.args.cancellation_rate:
+                reservation['status'] = 'cancelled'
+                reservation['cancelled_at'] = self.random_datetime(reservation['created_at'],
+                                                                   min(check_in, self.base_date))
+            elif check_out <= self.base_date:
+                reservation['status'] = 'cancelled'
+                reservation['cancelled_at'] = min(check_out + timedelta(hours=self.rng.randint(10, 12)),
+                                                  self.base_date)
+            else:
+                room['is_available'] = False
+                break
+            free_since = reservation['cancelled_at']
+
+        return reservations
+
+    def reservation(self, hotel_id: int, room: dict, check_in: datetime, client: dict, worker_ids: list,
+                    not_before: datetime) -> dict:
+        nights = self.rng.choices(self.stay_lengths, weights=self.stay_weights)[0]
+        # Bookings are made between 0 and 90 days ahead, skewed towards short
+        # notice, never after the base date and never while the room is taken
+        lead_days = min(90, int(self.rng.expovariate(1 / 20)))
+        created_at = check_in - timedelta(days=lead_days, seconds=self.rng.randrange(1, 86400))
+        created_at = max(min(created_at, self.base_date), not_before)
+
+        return {
+            'reservation_id': self.new_id(),
+            'client_id': client['client_id'],
+            'room_id': room['room_id'],
+            'check_in_date': check_in,
+            'check_out_date': check_in + timedelta(days=nights),
+            'guests': self.rng.randint(1, room['capacity']),
+            'nights': nights,
+            'total_price': nights * room['price_per_night'],
+            'status': 'active',
+            'hotel_id': hotel_id,
+            'hotel_name': hotel_name(hotel_id),
+            'created_by': self.rng.choice(worker_ids),
+            'created_at': created_at
+        }
+
+
+class FixtureWriter:
+    """Escribe un fichero JSONL (Extended JSON) por colección"""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.files = {
+            name: open(os.path.join(directory, f"{name}.jsonl"), 'w', encoding='utf-8')
+            for name in COLLECTIONS
+        }
+
+    def write(self, docs: dict):
+        for name, documents in docs.items():
+            self.files[name].writelines(json_util.dumps(doc) + '\n' for doc in documents)
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+
+
+class MongoLoader:
+    """Carga los documentos con insert_many desordenado en lotes grandes
+
+    Los hotel_id de los fixtures se trasladan a un bloque reservado en el
+    contador de server.py, para no chocar con hoteles ya existentes.
+    """
+
+    def __init__(self, mongo_url: str, db_name: str, batch_size: int):
+        self.db = pymongo.MongoClient(mongo_url)[db_name]
+        self.batch_size = batch_size
+        self.pending = {name: [] for name in COLLECTIONS}
+
+    def reserve_hotel_ids(self, count: int) -> int:
+        """Reserve a block of hotel_ids from the counter server.py uses; return the first"""
+        counter = self.db['counters'].find_one_and_update(
+            {'_id': 'hotel_id'},
+            {'$inc': {'seq': count}},
+            upsert=True,
+            return_document=pymongo.ReturnDocument.AFTER
+        )
+        return counter['seq'] - count + 1
+
+    def write(self, docs: dict, hotel_id: int, loaded_hotel_id: int):
+        for name, documents in docs.items():
+            self.pending[name].extend(self.relabel(name, doc, hotel_id, loaded_hotel_id) for doc in documents)
+            if len(self.pending[name]) >= self.batch_size:
+                self.flush(name)
+
+    @staticmethod
+    def relabel(collection: str, doc: dict, hotel_id: int, loaded_hotel_id: int) -> dict:
+        """Copy a fixture document onto its reserved hotel_id, with the names derived from it"""
+        doc = dict(doc, hotel_id=loaded_hotel_id)
+        if collection == 'hotels':
+            doc['name'] = hotel_name(loaded_hotel_id)
+        if 'hotel_name' in doc:
+            doc['hotel_name'] = hotel_name(loaded_hotel_id)
+        if 'email' in doc:
+            doc['email'] = doc['email'].replace(hotel_email('', hotel_id), hotel_email('', loaded_hotel_id))
+        return doc
+
+    def flush(self, name: str):
+        if self.pending[name]:
+            self.db[name].insert_many(self.pending[name], ordered=False)
+            self.pending[name] = []
+
+    def close(self, hotel_ids: list):
+        for name in COLLECTIONS:
+            self.flush(name)
+        # Running servers must drop any cached room catalog for these hotels
+        self.db['room_catalog_versions'].update_many(
+            {'_id': {'$in': hotel_ids}}, {'$inc': {'version': 1}}
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos de hoteles para pruebas de rendimiento")
+    parser.add_argument('--hotels', type=int, default=10, help="número de hoteles")
+    parser.add_argument('--scale', type=int, default=1,
+                        help="multiplicador de habitaciones, clientes y reservas por hotel (10, 100, 1000...)")
+    parser.add_argument('--rooms', type=int, default=3, help="habitaciones por hotel con scale=1")
+    parser.add_argument('--clients', type=int, default=10, help="clientes por hotel con scale=1")
+    parser.add_argument('--reservations', type=int, default=10,
+                        help="reservas por hotel con scale=1 (máximo: tras una estancia activa la "
+                             "habitación queda bloqueada y no admite más reservas)")
+    parser.add_argument('--workers', type=int, default=1, help="trabajadores por hotel")
+    parser.add_argument('--cancellation-rate', type=float, default=0.15,
+                        help="probabilidad de cancelar una reserva antes del check-in; las estancias terminadas "
+                             "también quedan 'cancelled' (así libera la habitación server.py), pero con "
+                             "cancelled_at posterior al check-out")
+    parser.add_argument('--base-date', default='2025-01-01', help="fecha de referencia (YYYY-MM-DD)")
+    parser.add_argument('--history-days', type=int, default=365, help="días de historial antes de la fecha base")
+    parser.add_argument('--future-days', type=int, default=90, help="días de reservas futuras tras la fecha base")
+    parser.add_argument('--seed', type=int, default=42, help="semilla para resultados reproducibles")
+    parser.add_argument('--password', default='password123', help="contraseña de todos los trabajadores")
+    parser.add_argument('--first-hotel-id', type=int, default=1,
+                        help="primer hotel_id de los fixtures; al cargar en MongoDB se usa un bloque reservado")
+    parser.add_argument('--output', help="directorio donde escribir fixtures JSONL")
+    parser.add_argument('--mongo-url', help="cargar los datos en esta instancia de MongoDB")
+    parser.add_argument('--db-name', default='hotel_reservations', help="base de datos de destino")
+    parser.add_argument('--batch-size', type=int, default=5000, help="documentos por insert_many")
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.mongo_url:
+        parser.error("indica --output, --mongo-url o ambos")
+    if args.hotels < 1:
+        parser.error("--hotels debe ser al menos 1")
+    args.rooms *= args.scale
+    args.clients *= args.scale
+    args.reservations *= args.scale
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("=== Generando datos sintéticos ===")
+
+    # bcrypt is slow by design, so every worker shares one hash
+    generator = DataGenerator(args, seeded_password_hash(args.password, args.seed))
+
+    writer = FixtureWriter(args.output) if args.output else None
+    loader = MongoLoader(args.mongo_url, args.db_name, args.batch_size) if args.mongo_url else None
+    hotel_ids = list(range(args.first_hotel_id, args.first_hotel_id + args.hotels))
+    loaded_hotel_ids = []
+    if loader:
+        first_loaded_id = loader.reserve_hotel_ids(args.hotels)
+        loaded_hotel_ids = list(range(first_loaded_id, first_loaded_id + args.hotels))
+
+    totals = {name: 0 for name in COLLECTIONS}
+    started = time.perf_counter()
+    for index, hotel_id in enumerate(hotel_ids):
+        docs = generator.hotel(hotel_id)
+        if writer:
+            writer.write(docs)
+        if loader:
+            loader.write(docs, hotel_id, loaded_hotel_ids[index])
+        for name, documents in docs.items():
+            totals[name] += len(documents)
+
+    if writer:
+        writer.close()
+    if loader:
+        loader.close(loaded_hotel_ids)
+
+    elapsed = time.perf_counter() - started
+    documents = sum(totals.values())
+    print(f"✅ {documents} documentos en {elapsed:.1f}s ({documents / max(elapsed, 1e-9):.0f} docs/s)")
+    for name, count in totals.items():
+        print(f"   {name}: {count}")
+    if loader:
+        print(f"   hotel_id en MongoDB {loaded_hotel_ids[0]}-{loaded_hotel_ids[-1]} "
+              f"(fixtures {hotel_ids[0]}-{hotel_ids[-1]})")
+    print(f"   contraseña de trabajadores: {args.password}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
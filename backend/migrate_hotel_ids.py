@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Migración única: asigna hotel_id a los documentos creados cuando el tenant
+solo se identificaba por hotel_name
+
+Ejecutar una vez contra la base de datos antes de desplegar la versión que
+filtra por hotel_id. Es idempotente y no borra hotel_name, de modo que la
+versión anterior sigue funcionando si hay que volver atrás. Cuando ya no
+haga falta volver atrás, --drop-hotel-name elimina el campo de clientes,
+habitaciones y reservas (los trabajadores lo conservan para mostrarlo).
+
+Uso:
+    python migrate_hotel_ids.py
+    python migrate_hotel_ids.py --drop-hotel-name
+"""
+
+import argparse
+import sys
+
+from server import (
+    clients_collection,
+    ensure_indexes,
+    get_or_create_hotel,
+    reservations_collection,
+    rooms_collection,
+    workers_collection,
+)
+
+TENANT_COLLECTIONS = [workers_collection, clients_collection, rooms_collection, reservations_collection]
+
+
+def backfill_hotel_ids() -> int:
+    """Assign hotel_id to documents that only carry hotel_name; return how many were updated"""
+    hotel_names = set()
+    for collection in TENANT_COLLECTIONS:
+        hotel_names.update(
+            name for name in collection.distinct('hotel_name', {'hotel_id': {'$exists': False}})
+            if name is not None
+        )
+
+    updated = 0
+    for hotel_name in sorted(hotel_names):
+        hotel_id = get_or_create_hotel(hotel_name)
+        query = {'hotel_name': hotel_name, 'hotel_id': {'$exists': False}}
+        for collection in TENANT_COLLECTIONS:
+            updated += collection.update_many(query, {'$set': {'hotel_id': hotel_id}}).modified_count
+        print(f"   {hotel_name} -> hotel_id {hotel_id}")
+    return updated
+
+
+def drop_hotel_name() -> int:
+    """Remove the copied hotel_name from clients, rooms and reservations that already have hotel_id"""
+    removed = 0
+    for collection in TENANT_COLLECTIONS[1:]:
+        removed += collection.update_many(
+            {'hotel_id': {'$exists': True}, 'hotel_name': {'$exists': True}},
+            {'$unset': {'hotel_name': ''}}
+        ).modified_count
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Asigna hotel_id a los datos existentes")
+    parser.add_argument('--drop-hotel-name', action='store_true',
+                        help="eliminar hotel_name de clientes, habitaciones y reservas ya migrados")
+    args = parser.parse_args(argv)
+
+    print("=== Migrando hotel_name a hotel_id ===")
+    # The unique index on hotels.name keeps concurrent hotel creation safe
+    ensure_indexes()
+    print(f"✅ {backfill_hotel_ids()} documentos actualizados")
+    if args.drop_hotel_name:
+        print(f"✅ hotel_name eliminado de {drop_hotel_name()} documentos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,118 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, timedelta
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+import asyncio
+import cProfile
+import functools
+import hmac
+import marshal
+import math
+import pstats
 import pymongo
 import os
+import random
+import sys
+import threading
+import time
 import jwt
 import bcrypt
 import uuid
 from bson import ObjectId
+from pymongo import monitoring
+from pymongo.errors import DuplicateKeyError
 
 # Environment variables
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
 JWT_SECRET = os.environ.get('JWT_SECRET', 'hotel-secret-key-2025')
 JWT_ALGORITHM = 'HS256'
+ROOM_CACHE_MAX_HOTELS = int(os.environ.get('ROOM_CACHE_MAX_HOTELS', '1024'))
+# Per-route concurrency limits; overrides are merged over the defaults
+DEFAULT_ADMISSION_LIMITS = 'auth=4,register=2,list=8'
+ADMISSION_LIMITS = os.environ.get('ADMISSION_LIMITS', '')
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', '2.0'))
+# 0 disables auth rate limiting
+AUTH_RATE_PER_MINUTE = float(os.environ.get('AUTH_RATE_PER_MINUTE', '10'))
+AUTH_RATE_BURST = int(os.environ.get('AUTH_RATE_BURST', '5'))
+# Number of reverse proxies in front of the app that append to X-Forwarded-For
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '0'))
+# Profiling is disabled unless an admin token is configured
+PROFILING_ADMIN_TOKEN = os.environ.get('PROFILING_ADMIN_TOKEN', '')
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_MAX_PROFILES = int(os.environ.get('PROFILING_MAX_PROFILES', '20'))
+
+# Mongo commands issued while a request is being profiled
+current_profile_commands = ContextVar('current_profile_commands', default=None)
+# Profilers started in threadpool threads for the request being profiled
+current_profile_threads = ContextVar('current_profile_threads', default=None)
+
+def profile_in_thread(func):
+    """Profile ``func`` in its own thread when the calling request is being profiled.
+
+    cProfile only sees the thread it was enabled on, so work that FastAPI or
+    run_in_threadpool moves to a worker thread needs its own profiler. The
+    threadpool copies the request's context, which is how this finds the
+    profile; run_profiled merges the collected stats afterwards.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        thread_profilers = current_profile_threads.get()
+        # Skip when nothing is profiled, or when a profiler is already
+        # active on this thread (e.g. called from the event loop)
+        if thread_profilers is None or sys.getprofile() is not None:
+            return func(*args, **kwargs)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            thread_profilers.append(profiler)
+    return wrapper
+
+class ProfileCommandListener(monitoring.CommandListener):
+    """Record the Mongo command timeline of the request being profiled, if any."""
+
+    def started(self, event):
+        commands = current_profile_commands.get()
+        if commands is not None:
+            commands.append({
+                'request_id': event.request_id,
+                'command': event.command_name,
+                'database': event.database_name,
+                'collection': event.command.get(event.command_name),
+                'started_ms': (time.perf_counter() - commands.started) * 1000
+            })
+
+    def _finish(self, event, status):
+        commands = current_profile_commands.get()
+        if commands is None:
+            return
+        for command in reversed(commands):
+            if command['request_id'] == event.request_id:
+                command['duration_ms'] = event.duration_micros / 1000
+                command['status'] = status
+                break
+
+    def succeeded(self, event):
+        self._finish(event, 'ok')
+
+    def failed(self, event):
+        self._finish(event, 'failed')
+
+class CommandTimeline(list):
+    def __init__(self):
+        super().__init__()
+        self.started = time.perf_counter()
 
 # Database connection
-client = pymongo.MongoClient(MONGO_URL)
+client = pymongo.MongoClient(MONGO_URL, event_listeners=[ProfileCommandListener()])
 db = client['hotel_reservations']
 
 # Collections
@@ -25,6 +120,9 @@ workers_collection = db['workers']
 clients_collection = db['clients']
 rooms_collection = db['rooms']
 reservations_collection = db['reservations']
+hotels_collection = db['hotels']
+counters_collection = db['counters']
+room_catalog_versions_collection = db['room_catalog_versions']
 
 # FastAPI app
 app = FastAPI(title="Hotel Reservation System", version="1.0.0")
@@ -74,27 +172,33 @@ class ReservationCreate(BaseModel):
     guests: int
 
 # Helper functions
+@profile_in_thread
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
+@profile_in_thread
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
-def create_token(worker_id: str) -> str:
+def create_token(worker_id: str, hotel_id: int) -> str:
     payload = {
         'worker_id': worker_id,
+        'hotel_id': hotel_id,
         'exp': datetime.utcnow() + timedelta(days=7)
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+@profile_in_thread
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         worker_id = payload.get('worker_id')
-        if not worker_id:
+        hotel_id = payload.get('hotel_id')
+        # Tokens issued before hotel_id existed carry no tenant and must log in again
+        if not worker_id or hotel_id is None:
             raise HTTPException(status_code=401, detail="Token inválido")
         
-        worker = workers_collection.find_one({'worker_id': worker_id})
+        worker = workers_collection.find_one({'hotel_id': hotel_id, 'worker_id': worker_id})
         if not worker:
             raise HTTPException(status_code=401, detail="Trabajador no encontrado")
         
@@ -104,23 +208,430 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Token inválido")
 
+# Tenants
+def next_sequence(name: str) -> int:
+    doc = counters_collection.find_one_and_update(
+        {'_id': name},
+        {'$inc': {'seq': 1}},
+        upsert=True,
+        return_document=pymongo.ReturnDocument.AFTER
+    )
+    return doc['seq']
+
+def get_or_create_hotel(hotel_name: str) -> int:
+    """Return the compact integer hotel_id for a hotel name, creating it if needed."""
+    hotel = hotels_collection.find_one({'name': hotel_name})
+    if hotel:
+        return hotel['hotel_id']
+    
+    hotel_id = next_sequence('hotel_id')
+    try:
+        hotels_collection.insert_one({
+            'hotel_id': hotel_id,
+            'name': hotel_name,
+            'created_at': datetime.utcnow()
+        })
+    except DuplicateKeyError:
+        # Registered concurrently by another request; the sequence gap is harmless
+        return hotels_collection.find_one({'name': hotel_name})['hotel_id']
+    return hotel_id
+
+def ensure_indexes():
+    # Tenant data is always queried by hotel_id first so indexes stay
+    # partitioned per hotel and hotel_id can serve as the shard key
+    hotels_collection.create_index('hotel_id', unique=True)
+    hotels_collection.create_index('name', unique=True)
+    workers_collection.create_index('email')
+    workers_collection.create_index([('hotel_id', 1), ('worker_id', 1)])
+    clients_collection.create_index([('hotel_id', 1), ('client_id', 1)])
+    clients_collection.create_index([('hotel_id', 1), ('email', 1)], unique=True)
+    rooms_collection.create_index([('hotel_id', 1), ('room_id', 1)])
+    reservations_collection.create_index([('hotel_id', 1), ('reservation_id', 1)])
+    reservations_collection.create_index([('hotel_id', 1), ('status', 1)])
+
+# Existing data is migrated once with migrate_hotel_ids.py, not on every boot
+@app.on_event("startup")
+def prepare_database():
+    ensure_indexes()
+
+# Room catalog cache
+class RoomCatalogCache:
+    """In-process, per-hotel cache of room documents.
+
+    Every entry is stamped with the hotel's catalog version stored in
+    ``room_catalog_versions``. Each read compares the stamp against that
+    document (a single ``_id`` lookup), so a write made by another uvicorn
+    worker invalidates our copy on the next request. Writes made by this
+    process are applied in place and bump the version.
+    """
+
+    def __init__(self, max_hotels: int):
+        self.max_hotels = max_hotels
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _current_version(self, hotel_id: int) -> int:
+        doc = room_catalog_versions_collection.find_one({'_id': hotel_id})
+        return doc['version'] if doc else 0
+
+    def _bump_version(self, hotel_id: int) -> int:
+        doc = room_catalog_versions_collection.find_one_and_update(
+            {'_id': hotel_id},
+            {'$inc': {'version': 1}},
+            upsert=True,
+            return_document=pymongo.ReturnDocument.AFTER
+        )
+        return doc['version']
+
+    def get(self, hotel_id: int) -> dict:
+        """Return the hotel's rooms keyed by room_id."""
+        version = self._current_version(hotel_id)
+        with self._lock:
+            entry = self._entries.get(hotel_id)
+            if entry and entry['version'] == version:
+                self._entries.move_to_end(hotel_id)
+                self.hits += 1
+                return entry['rooms']
+            self.misses += 1
+
+        # Version is read before the rooms, so a concurrent write can only
+        # make this entry look older than it is, never newer.
+        rooms = {
+            room['room_id']: room
+            for room in rooms_collection.find({'hotel_id': hotel_id}, {'_id': 0})
+        }
+        with self._lock:
+            self._entries[hotel_id] = {'version': version, 'rooms': rooms}
+            self._entries.move_to_end(hotel_id)
+            while len(self._entries) > self.max_hotels:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return rooms
+
+    def put_room(self, hotel_id: int, room: dict):
+        """Write-through after a room has been inserted or updated in Mongo."""
+        version = self._bump_version(hotel_id)
+        with self._lock:
+            entry = self._entries.get(hotel_id)
+            if entry and entry['version'] == version - 1:
+                entry['rooms'][room['room_id']] = room
+                entry['version'] = version
+            elif entry:
+                # Another process wrote in between; reload on next read
+                del self._entries[hotel_id]
+                self.invalidations += 1
+
+    def invalidate(self, hotel_id: int):
+        self._bump_version(hotel_id)
+        with self._lock:
+            if self._entries.pop(hotel_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'size': len(self._entries),
+            'max_hotels': self.max_hotels
+        }
+
+room_catalog_cache = RoomCatalogCache(ROOM_CACHE_MAX_HOTELS)
+
+# Admission control
+class ConcurrencyLimiter:
+    """Bound how many requests of one route class run at once in this process.
+
+    Used as a FastAPI dependency. Requests wait up to ``queue_timeout``
+    seconds for a slot and are shed with 503 + Retry-After otherwise.
+    """
+
+    def __init__(self, name: str, limit: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    async def __call__(self):
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Servidor saturado, intente más tarde",
+                headers={'Retry-After': str(math.ceil(self.queue_timeout))}
+            )
+        finally:
+            self.waiting -= 1
+        
+        self.active += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            'limit': self.limit,
+            'active': self.active,
+            'waiting': self.waiting,
+            'admitted': self.admitted,
+            'rejected': self.rejected
+        }
+
+class TokenBucketLimiter:
+    """Per-key token buckets, bounded to the ``max_keys`` most recent keys.
+
+    A non-positive rate disables limiting.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _refill(self, key: str, now: float) -> float:
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    def _store(self, key: str, tokens: float, now: float):
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def retry_after(self, key: str) -> float:
+        """Return 0 if a token is available, else seconds until the next one, without consuming."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refill(key, now)
+            self._store(key, tokens, now)
+        if tokens >= 1:
+            return 0.0
+        self.rejected += 1
+        return (1 - tokens) / self.rate
+
+    def take(self, key: str) -> float:
+        """Consume one token; return 0 if allowed, else seconds until the next token."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refill(key, now)
+            if tokens >= 1:
+                retry_after = 0.0
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / self.rate
+                self.rejected += 1
+            self._store(key, tokens, now)
+        return retry_after
+
+    def stats(self) -> dict:
+        return {'rejected': self.rejected, 'tracked_keys': len(self._buckets)}
+
+def parse_admission_limits(spec: str) -> dict:
+    limits = {}
+    for item in spec.split(','):
+        if item.strip():
+            name, limit = item.split('=')
+            limits[name.strip()] = int(limit)
+    return limits
+
+admission = {
+    name: ConcurrencyLimiter(name, limit, ADMISSION_QUEUE_TIMEOUT)
+    for name, limit in {
+        **parse_admission_limits(DEFAULT_ADMISSION_LIMITS),
+        **parse_admission_limits(ADMISSION_LIMITS)
+    }.items()
+}
+auth_rate_limiter = TokenBucketLimiter(AUTH_RATE_PER_MINUTE, AUTH_RATE_BURST)
+
+def client_ip(request: Request) -> str:
+    """Return the caller's IP, skipping the addresses appended by trusted proxies.
+
+    Each of the TRUSTED_PROXY_HOPS proxies appends the address it received
+    the request from, so the client is that many entries from the end of
+    X-Forwarded-For. Entries further left are client-supplied and ignored.
+    """
+    if TRUSTED_PROXY_HOPS > 0:
+        forwarded = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else 'unknown'
+
+def raise_rate_limited(retry_after: float):
+    raise HTTPException(
+        status_code=429,
+        detail="Demasiadas solicitudes, intente más tarde",
+        headers={'Retry-After': str(math.ceil(retry_after))}
+    )
+
+def enforce_auth_rate_limit(key: str):
+    retry_after = auth_rate_limiter.take(key)
+    if retry_after:
+        raise_rate_limited(retry_after)
+
+async def auth_rate_limit(request: Request):
+    enforce_auth_rate_limit(f"ip:{client_ip(request)}")
+
+# Request profiling
+class ProfileStore:
+    """Ring buffer holding the last ``max_profiles`` request profiles."""
+
+    def __init__(self, max_profiles: int):
+        self._profiles = deque(maxlen=max_profiles)
+        self._lock = threading.Lock()
+
+    def add(self, profile: dict):
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> list:
+        with self._lock:
+            return [
+                {key: value for key, value in profile.items() if key not in ('stats', 'mongo_commands')}
+                for profile in reversed(self._profiles)
+            ]
+
+    def get(self, profile_id: str) -> dict:
+        with self._lock:
+            for profile in self._profiles:
+                if profile['profile_id'] == profile_id:
+                    return profile
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+
+profile_store = ProfileStore(PROFILING_MAX_PROFILES)
+# cProfile allows a single active profiler per thread, so at most one
+# request on the event loop is profiled at a time
+profiler_lock = asyncio.Lock()
+requests_in_flight = 0
+active_profile = None
+
+def is_admin_token(token: Optional[str]) -> bool:
+    return bool(PROFILING_ADMIN_TOKEN) and bool(token) and hmac.compare_digest(token, PROFILING_ADMIN_TOKEN)
+
+def verify_admin(request: Request):
+    if not is_admin_token(request.headers.get('X-Admin-Token')):
+        raise HTTPException(status_code=403, detail="Acceso denegado")
+
+def should_profile(request: Request) -> bool:
+    # The token only travels in headers so it never reaches access logs;
+    # ?profile=1 just marks the request when an admin header is present
+    requested = 'X-Profile-Token' in request.headers or request.query_params.get('profile') == '1'
+    if requested:
+        return is_admin_token(request.headers.get('X-Profile-Token') or request.headers.get('X-Admin-Token'))
+    return random.random() < PROFILING_SAMPLE_RATE
+
+async def profile_request(request: Request, call_next):
+    """Run the request under cProfile when asked to or sampled.
+
+    Work moved to the threadpool is profiled by ``profile_in_thread`` and
+    merged in. cProfile records everything on the event loop thread, so
+    requests that overlap the profiled one are mixed into its stats. The profile records
+    how many did (``overlapping_requests``); a profile with zero overlap
+    describes this request alone.
+    """
+    global requests_in_flight
+    requests_in_flight += 1
+    if active_profile is not None:
+        active_profile['overlapping_requests'] += 1
+    try:
+        if not should_profile(request) or profiler_lock.locked():
+            return await call_next(request)
+        async with profiler_lock:
+            return await run_profiled(request, call_next)
+    finally:
+        requests_in_flight -= 1
+
+async def run_profiled(request: Request, call_next):
+    global active_profile
+    commands = CommandTimeline()
+    thread_profilers = []
+    token = current_profile_commands.set(commands)
+    threads_token = current_profile_threads.set(thread_profilers)
+    profiler = cProfile.Profile()
+    profile = {
+        'profile_id': str(uuid.uuid4()),
+        'method': request.method,
+        'path': request.url.path,
+        'started_at': datetime.utcnow(),
+        'overlapping_requests': requests_in_flight - 1
+    }
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active on this thread
+        current_profile_commands.reset(token)
+        current_profile_threads.reset(threads_token)
+        return await call_next(request)
+    active_profile = profile
+    try:
+        response = await call_next(request)
+    finally:
+        profiler.disable()
+        active_profile = None
+        current_profile_commands.reset(token)
+        current_profile_threads.reset(threads_token)
+    
+    # Merge the event loop's stats with those of the threadpool work
+    stats = pstats.Stats(profiler)
+    for thread_profiler in thread_profilers:
+        stats.add(thread_profiler)
+    profile_store.add({
+        **profile,
+        'status_code': response.status_code,
+        'duration_ms': (time.perf_counter() - commands.started) * 1000,
+        'mongo_command_count': len(commands),
+        'mongo_commands': list(commands),
+        'thread_profiles': len(thread_profilers),
+        'stats': stats.stats
+    })
+    return response
+
+# The middleware costs a task hop on every request, so only install it
+# when profiling can actually be used
+if PROFILING_ADMIN_TOKEN:
+    app.add_middleware(BaseHTTPMiddleware, dispatch=profile_request)
+
 # API Routes
 
 # Worker Authentication
-@app.post("/api/workers/register")
+@app.post("/api/workers/register", dependencies=[Depends(auth_rate_limit), Depends(admission['register'])])
 async def register_worker(worker: WorkerCreate):
     # Check if worker already exists
     if workers_collection.find_one({'email': worker.email}):
         raise HTTPException(status_code=400, detail="El trabajador ya existe")
     
     # Create worker
+    hotel_id = get_or_create_hotel(worker.hotel_name)
     worker_id = str(uuid.uuid4())
     worker_data = {
         'worker_id': worker_id,
         'email': worker.email,
-        'password': hash_password(worker.password),
+        'password': await run_in_threadpool(hash_password, worker.password),
         'name': worker.name,
         'phone': worker.phone,
+        'hotel_id': hotel_id,
         'hotel_name': worker.hotel_name,
         'created_at': datetime.utcnow()
     }
@@ -136,6 +647,7 @@ async def register_worker(worker: WorkerCreate):
             'price_per_night': 50.0,
             'capacity': 2,
             'description': 'Habitación simple con cama matrimonial',
+            'hotel_id': hotel_id,
             'hotel_name': worker.hotel_name,
             'is_available': True,
             'created_at': datetime.utcnow()
@@ -147,6 +659,7 @@ async def register_worker(worker: WorkerCreate):
             'price_per_night': 80.0,
             'capacity': 4,
             'description': 'Habitación doble con dos camas',
+            'hotel_id': hotel_id,
             'hotel_name': worker.hotel_name,
             'is_available': True,
             'created_at': datetime.utcnow()
@@ -158,6 +671,7 @@ async def register_worker(worker: WorkerCreate):
             'price_per_night': 150.0,
             'capacity': 6,
             'description': 'Suite de lujo con jacuzzi',
+            'hotel_id': hotel_id,
             'hotel_name': worker.hotel_name,
             'is_available': True,
             'created_at': datetime.utcnow()
@@ -165,18 +679,27 @@ async def register_worker(worker: WorkerCreate):
     ]
     
     rooms_collection.insert_many(default_rooms)
+    room_catalog_cache.invalidate(hotel_id)
     
     return {'message': 'Trabajador registrado exitosamente', 'worker_id': worker_id}
 
-@app.post("/api/workers/login")
-async def login_worker(worker: WorkerLogin):
-    # Find worker
+@app.post("/api/workers/login", dependencies=[Depends(auth_rate_limit), Depends(admission['auth'])])
+async def login_worker(worker: WorkerLogin, request: Request):
+    # Only failed attempts are charged, and per IP, so guessing a worker's
+    # password from one address can't lock that worker out everywhere
+    failure_key = f"login:{client_ip(request)}:{worker.email}"
+    retry_after = auth_rate_limiter.retry_after(failure_key)
+    if retry_after:
+        raise_rate_limited(retry_after)
+    
+    # Find worker; bcrypt runs off the event loop
     worker_data = workers_collection.find_one({'email': worker.email})
-    if not worker_data or not verify_password(worker.password, worker_data['password']):
+    if not worker_data or not await run_in_threadpool(verify_password, worker.password, worker_data['password']):
+        auth_rate_limiter.take(failure_key)
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
     
     # Create token
-    token = create_token(worker_data['worker_id'])
+    token = create_token(worker_data['worker_id'], worker_data['hotel_id'])
     
     return {
         'token': token,
@@ -201,7 +724,7 @@ async def get_worker_profile(current_worker = Depends(verify_token)):
 @app.post("/api/clients")
 async def create_client(client: ClientCreate, current_worker = Depends(verify_token)):
     # Check if client already exists
-    if clients_collection.find_one({'email': client.email}):
+    if clients_collection.find_one({'hotel_id': current_worker['hotel_id'], 'email': client.email}):
         raise HTTPException(status_code=400, detail="El cliente ya existe")
     
     client_id = str(uuid.uuid4())
@@ -211,19 +734,27 @@ async def create_client(client: ClientCreate, current_worker = Depends(verify_to
         'email': client.email,
         'phone': client.phone,
         'identification': client.identification,
+        'hotel_id': current_worker['hotel_id'],
         'hotel_name': current_worker['hotel_name'],
         'created_by': current_worker['worker_id'],
         'created_at': datetime.utcnow()
     }
     
-    clients_collection.insert_one(client_data)
+    try:
+        clients_collection.insert_one(client_data)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent request for the same email
+        raise HTTPException(status_code=400, detail="El cliente ya existe")
     
     return {'message': 'Cliente registrado exitosamente', 'client_id': client_id}
 
-@app.get("/api/clients")
-async def get_clients(current_worker = Depends(verify_token)):
+# Limited list endpoints are plain functions so their Mongo work runs in the
+# threadpool and the admission slot bounds it, instead of blocking the loop
+@app.get("/api/clients", dependencies=[Depends(admission['list'])])
+@profile_in_thread
+def get_clients(current_worker = Depends(verify_token)):
     clients = list(clients_collection.find({
-        'hotel_name': current_worker['hotel_name']
+        'hotel_id': current_worker['hotel_id']
     }, {'_id': 0}))
     
     return clients
@@ -239,45 +770,53 @@ async def create_room(room: RoomCreate, current_worker = Depends(verify_token)):
         'price_per_night': room.price_per_night,
         'capacity': room.capacity,
         'description': room.description,
+        'hotel_id': current_worker['hotel_id'],
         'hotel_name': current_worker['hotel_name'],
         'is_available': True,
         'created_at': datetime.utcnow()
     }
     
     rooms_collection.insert_one(room_data)
+    room_data.pop('_id', None)
+    room_catalog_cache.put_room(current_worker['hotel_id'], room_data)
     
     return {'message': 'Habitación creada exitosamente', 'room_id': room_id}
 
 @app.get("/api/rooms")
 async def get_rooms(current_worker = Depends(verify_token)):
-    rooms = list(rooms_collection.find({
-        'hotel_name': current_worker['hotel_name']
-    }, {'_id': 0}))
+    rooms = list(room_catalog_cache.get(current_worker['hotel_id']).values())
     
     return rooms
 
 @app.get("/api/rooms/available")
 async def get_available_rooms(current_worker = Depends(verify_token)):
-    rooms = list(rooms_collection.find({
-        'hotel_name': current_worker['hotel_name'],
-        'is_available': True
-    }, {'_id': 0}))
+    rooms = [
+        room for room in room_catalog_cache.get(current_worker['hotel_id']).values()
+        if room['is_available']
+    ]
     
     return rooms
 
 # Reservation Management
+def release_room(hotel_id: int, room_id: str):
+    room = rooms_collection.find_one_and_update(
+        {'hotel_id': hotel_id, 'room_id': room_id},
+        {'$set': {'is_available': True}},
+        projection={'_id': 0},
+        return_document=pymongo.ReturnDocument.AFTER
+    )
+    if room:
+        room_catalog_cache.put_room(hotel_id, room)
+
 @app.post("/api/reservations")
 async def create_reservation(reservation: ReservationCreate, current_worker = Depends(verify_token)):
+    hotel_id = current_worker['hotel_id']
+    
     # Validate client exists
-    client = clients_collection.find_one({'client_id': reservation.client_id})
+    client = clients_collection.find_one({'hotel_id': hotel_id, 'client_id': reservation.client_id})
     if not client:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
     
-    # Validate room exists and is available
-    room = rooms_collection.find_one({'room_id': reservation.room_id, 'is_available': True})
-    if not room:
-        raise HTTPException(status_code=404, detail="Habitación no disponible")
-    
     # Parse dates
     try:
         check_in = datetime.strptime(reservation.check_in_date, "%Y-%m-%d")
@@ -288,6 +827,18 @@ async def create_reservation(reservation: ReservationCreate, current_worker = De
     if check_in >= check_out:
         raise HTTPException(status_code=400, detail="La fecha de salida debe ser posterior a la de entrada")
     
+    # Validate the room exists and is available by claiming it atomically;
+    # the returned document feeds both the price and the cache write-through
+    room = rooms_collection.find_one_and_update(
+        {'hotel_id': hotel_id, 'room_id': reservation.room_id, 'is_available': True},
+        {'$set': {'is_available': False}},
+        projection={'_id': 0},
+        return_document=pymongo.ReturnDocument.AFTER
+    )
+    if not room:
+        raise HTTPException(status_code=404, detail="Habitación no disponible")
+    room_catalog_cache.put_room(hotel_id, room)
+    
     # Calculate total price
     nights = (check_out - check_in).days
     total_price = nights * room['price_per_night']
@@ -304,18 +855,18 @@ async def create_reservation(reservation: ReservationCreate, current_worker = De
         'nights': nights,
         'total_price': total_price,
         'status': 'active',
+        'hotel_id': current_worker['hotel_id'],
         'hotel_name': current_worker['hotel_name'],
         'created_by': current_worker['worker_id'],
         'created_at': datetime.utcnow()
     }
     
-    reservations_collection.insert_one(reservation_data)
-    
-    # Mark room as unavailable
-    rooms_collection.update_one(
-        {'room_id': reservation.room_id},
-        {'$set': {'is_available': False}}
-    )
+    try:
+        reservations_collection.insert_one(reservation_data)
+    except Exception:
+        # Release the claim so a failed insert doesn't leave the room blocked
+        release_room(hotel_id, reservation.room_id)
+        raise
     
     return {
         'message': 'Reserva creada exitosamente',
@@ -324,16 +875,27 @@ async def create_reservation(reservation: ReservationCreate, current_worker = De
         'nights': nights
     }
 
-@app.get("/api/reservations")
-async def get_reservations(current_worker = Depends(verify_token)):
+@app.get("/api/reservations", dependencies=[Depends(admission['list'])])
+@profile_in_thread
+def get_reservations(current_worker = Depends(verify_token)):
+    hotel_id = current_worker['hotel_id']
     reservations = list(reservations_collection.find({
-        'hotel_name': current_worker['hotel_name']
+        'hotel_id': hotel_id
     }, {'_id': 0}))
     
     # Add client and room details
+    client_ids = list({reservation['client_id'] for reservation in reservations})
+    clients = {
+        client['client_id']: client
+        for client in clients_collection.find(
+            {'hotel_id': hotel_id, 'client_id': {'$in': client_ids}},
+            {'_id': 0, 'client_id': 1, 'name': 1}
+        )
+    }
+    rooms = room_catalog_cache.get(hotel_id)
     for reservation in reservations:
-        client = clients_collection.find_one({'client_id': reservation['client_id']})
-        room = rooms_collection.find_one({'room_id': reservation['room_id']})
+        client = clients.get(reservation['client_id'])
+        room = rooms.get(reservation['room_id'])
         
         reservation['client_name'] = client['name'] if client else 'Cliente no encontrado'
         reservation['room_number'] = room['room_number'] if room else 'Habitación no encontrada'
@@ -342,34 +904,33 @@ async def get_reservations(current_worker = Depends(verify_token)):
 
 @app.delete("/api/reservations/{reservation_id}")
 async def cancel_reservation(reservation_id: str, current_worker = Depends(verify_token)):
-    reservation = reservations_collection.find_one({'reservation_id': reservation_id})
+    hotel_id = current_worker['hotel_id']
+    reservation = reservations_collection.find_one({'hotel_id': hotel_id, 'reservation_id': reservation_id})
     if not reservation:
         raise HTTPException(status_code=404, detail="Reserva no encontrada")
     
     # Update reservation status
     reservations_collection.update_one(
-        {'reservation_id': reservation_id},
+        {'hotel_id': hotel_id, 'reservation_id': reservation_id},
         {'$set': {'status': 'cancelled', 'cancelled_at': datetime.utcnow()}}
     )
     
     # Mark room as available
-    rooms_collection.update_one(
-        {'room_id': reservation['room_id']},
-        {'$set': {'is_available': True}}
-    )
+    release_room(hotel_id, reservation['room_id'])
     
     return {'message': 'Reserva cancelada exitosamente'}
 
 # Dashboard Stats
 @app.get("/api/dashboard/stats")
 async def get_dashboard_stats(current_worker = Depends(verify_token)):
-    hotel_name = current_worker['hotel_name']
+    hotel_id = current_worker['hotel_id']
     
     # Count stats
-    total_clients = clients_collection.count_documents({'hotel_name': hotel_name})
-    total_rooms = rooms_collection.count_documents({'hotel_name': hotel_name})
-    available_rooms = rooms_collection.count_documents({'hotel_name': hotel_name, 'is_available': True})
-    active_reservations = reservations_collection.count_documents({'hotel_name': hotel_name, 'status': 'active'})
+    total_clients = clients_collection.count_documents({'hotel_id': hotel_id})
+    rooms = room_catalog_cache.get(hotel_id).values()
+    total_rooms = len(rooms)
+    available_rooms = sum(1 for room in rooms if room['is_available'])
+    active_reservations = reservations_collection.count_documents({'hotel_id': hotel_id, 'status': 'active'})
     
     return {
         'total_clients': total_clients,
@@ -379,6 +940,48 @@ async def get_dashboard_stats(current_worker = Depends(verify_token)):
         'active_reservations': active_reservations
     }
 
+@app.get("/api/metrics", dependencies=[Depends(verify_admin)])
+async def get_metrics():
+    return {
+        'room_catalog_cache': room_catalog_cache.stats(),
+        'admission': {name: limiter.stats() for name, limiter in admission.items()},
+        'auth_rate_limit': auth_rate_limiter.stats()
+    }
+
+# Profiling admin
+@app.get("/api/admin/profiles", dependencies=[Depends(verify_admin)])
+async def list_profiles():
+    return profile_store.list()
+
+@app.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(verify_admin)])
+async def get_profile(profile_id: str, limit: int = 30):
+    profile = profile_store.get(profile_id)
+    summary = {key: value for key, value in profile.items() if key != 'stats'}
+    
+    # Top functions by cumulative time, as shown by pstats
+    functions = sorted(profile['stats'].items(), key=lambda item: item[1][3], reverse=True)
+    summary['functions'] = [
+        {
+            'function': pstats.func_std_string(func),
+            'calls': primitive_calls,
+            'total_calls': total_calls,
+            'total_time_ms': total_time * 1000,
+            'cumulative_time_ms': cumulative_time * 1000
+        }
+        for func, (primitive_calls, total_calls, total_time, cumulative_time, _) in functions[:limit]
+    ]
+    return summary
+
+@app.get("/api/admin/profiles/{profile_id}/pstats", dependencies=[Depends(verify_admin)])
+async def download_profile(profile_id: str):
+    profile = profile_store.get(profile_id)
+    # Same format as cProfile.Profile.dump_stats, loadable with pstats/snakeviz
+    return Response(
+        content=marshal.dumps(profile['stats']),
+        media_type='application/octet-stream',
+        headers={'Content-Disposition': f'attachment; filename="{profile_id}.pstats"'}
+    )
+
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
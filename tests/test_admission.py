@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def test_concurrency_limiter_sheds_with_503_after_queue_timeout():
+    async def scenario():
+        limiter = server.ConcurrencyLimiter('list', limit=1, queue_timeout=0.01)
+        holder = limiter()
+        await holder.__anext__()
+
+        with pytest.raises(HTTPException) as excinfo:
+            await limiter().__anext__()
+
+        await holder.aclose()
+        return limiter, excinfo.value
+
+    limiter, error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert error.headers['Retry-After'] == '1'
+    assert limiter.stats()['rejected'] == 1
+    assert limiter.stats()['active'] == 0
+
+
+def test_concurrency_limiter_admits_once_slot_is_released():
+    async def scenario():
+        limiter = server.ConcurrencyLimiter('list', limit=1, queue_timeout=1)
+        holder = limiter()
+        await holder.__anext__()
+        waiter = asyncio.ensure_future(limiter().__anext__())
+        await asyncio.sleep(0)
+        await holder.aclose()
+        await waiter
+        return limiter
+
+    assert asyncio.run(scenario()).stats()['admitted'] == 2
+
+
+def test_token_bucket_rejects_when_empty_and_refills(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server.time, 'monotonic', lambda: now[0])
+    bucket = server.TokenBucketLimiter(rate_per_minute=60, burst=2)
+
+    assert bucket.take('ip:1') == 0
+    assert bucket.take('ip:1') == 0
+    assert bucket.take('ip:1') == pytest.approx(1.0)
+    assert bucket.take('ip:2') == 0
+
+    now[0] += 1
+    assert bucket.take('ip:1') == 0
+    assert bucket.stats()['rejected'] == 1
+
+
+def test_retry_after_does_not_consume(monkeypatch):
+    monkeypatch.setattr(server.time, 'monotonic', lambda: 1000.0)
+    bucket = server.TokenBucketLimiter(rate_per_minute=60, burst=1)
+
+    assert bucket.retry_after('k') == 0
+    assert bucket.retry_after('k') == 0
+    bucket.take('k')
+    assert bucket.retry_after('k') > 0
+
+
+def test_zero_rate_disables_the_bucket():
+    bucket = server.TokenBucketLimiter(rate_per_minute=0, burst=1)
+
+    assert all(bucket.take('ip:1') == 0 for _ in range(5))
+
+
+def test_enforce_auth_rate_limit_raises_429(monkeypatch):
+    monkeypatch.setattr(server, 'auth_rate_limiter', server.TokenBucketLimiter(rate_per_minute=6, burst=1))
+    server.enforce_auth_rate_limit('ip:1')
+
+    with pytest.raises(HTTPException) as excinfo:
+        server.enforce_auth_rate_limit('ip:1')
+
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.headers['Retry-After'] == '10'
+
+
+class FakeRequest:
+    def __init__(self, host, forwarded=None):
+        self.client = type('Client', (), {'host': host})()
+        self.headers = {'X-Forwarded-For': forwarded} if forwarded else {}
+
+
+def test_client_ip_uses_trusted_forwarded_hop(monkeypatch):
+    monkeypatch.setattr(server, 'TRUSTED_PROXY_HOPS', 1)
+
+    assert server.client_ip(FakeRequest('10.0.0.1', 'spoofed, 203.0.113.7')) == '203.0.113.7'
+    assert server.client_ip(FakeRequest('10.0.0.1')) == '10.0.0.1'
+
+
+def test_client_ip_ignores_forwarded_header_without_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(server, 'TRUSTED_PROXY_HOPS', 0)
+
+    assert server.client_ip(FakeRequest('10.0.0.1', '203.0.113.7')) == '10.0.0.1'
+
+
+def test_parse_admission_limits():
+    assert server.parse_admission_limits('auth=4, list=16,') == {'auth': 4, 'list': 16}
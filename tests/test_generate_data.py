@@ -0,0 +1,106 @@
+import filecmp
+import os
+from collections import defaultdict
+
+import generate_data
+
+
+def generate(tmp_path, name, *extra):
+    output = tmp_path / name
+    generate_data.main(['--hotels', '2', '--scale', '5', '--output', str(output), *extra])
+    return output
+
+
+def read_fixtures(directory, collection):
+    with open(os.path.join(directory, f"{collection}.jsonl"), encoding='utf-8') as file:
+        return [generate_data.json_util.loads(line) for line in file]
+
+
+def test_same_seed_produces_identical_fixtures(tmp_path):
+    first = generate(tmp_path, 'first', '--seed', '7')
+    second = generate(tmp_path, 'second', '--seed', '7')
+
+    for collection in generate_data.COLLECTIONS:
+        assert filecmp.cmp(first / f"{collection}.jsonl", second / f"{collection}.jsonl", shallow=False)
+
+
+def test_different_seed_produces_different_fixtures(tmp_path):
+    first = generate(tmp_path, 'first', '--seed', '7')
+    second = generate(tmp_path, 'second', '--seed', '8')
+
+    assert not filecmp.cmp(first / 'reservations.jsonl', second / 'reservations.jsonl', shallow=False)
+
+
+def test_rooms_have_at_most_one_active_stay_and_no_overlaps(tmp_path):
+    output = generate(tmp_path, 'fixtures', '--reservations', '20')
+    rooms = {room['room_id']: room for room in read_fixtures(output, 'rooms')}
+    stays = defaultdict(list)
+    for reservation in read_fixtures(output, 'reservations'):
+        stays[reservation['room_id']].append(reservation)
+
+    for room_id, reservations in stays.items():
+        active = [r for r in reservations if r['status'] == 'active']
+        assert len(active) <= 1
+        assert rooms[room_id]['is_available'] == (not active)
+
+        # Bookings cancelled before check-in free their dates for rebooking
+        stayed = sorted(
+            (r for r in reservations if r.get('cancelled_at', r['check_in_date']) >= r['check_in_date']),
+            key=lambda r: r['check_in_date']
+        )
+        for previous, current in zip(stayed, stayed[1:]):
+            assert current['check_in_date'] >= previous['check_out_date']
+
+
+def test_seeded_password_hash_is_stable_and_valid():
+    password_hash = generate_data.seeded_password_hash('password123', 42)
+
+    assert password_hash == generate_data.seeded_password_hash('password123', 42)
+    assert generate_data.bcrypt.checkpw(b'password123', password_hash.encode('utf-8'))
+
+
+def test_loader_relabels_fixture_ids_onto_reserved_block():
+    hotel = {'hotel_id': 1, 'name': generate_data.hotel_name(1)}
+    worker = {'hotel_id': 1, 'hotel_name': generate_data.hotel_name(1),
+              'email': generate_data.hotel_email('trabajador0', 1), 'name': 'Ana López'}
+
+    loaded_hotel = generate_data.MongoLoader.relabel('hotels', hotel, 1, 57)
+    loaded_worker = generate_data.MongoLoader.relabel('workers', worker, 1, 57)
+
+    assert loaded_hotel == {'hotel_id': 57, 'name': generate_data.hotel_name(57)}
+    assert loaded_worker['email'] == generate_data.hotel_email('trabajador0', 57)
+    assert loaded_worker['hotel_name'] == generate_data.hotel_name(57)
+    assert loaded_worker['name'] == 'Ana López'
+    assert hotel['hotel_id'] == 1
+
+
+def test_no_document_is_dated_after_the_base_date(tmp_path):
+    output = generate(tmp_path, 'fixtures', '--base-date', '2025-01-01')
+    base_date = generate_data.datetime(2025, 1, 1)
+
+    for reservation in read_fixtures(output, 'reservations'):
+        assert reservation['created_at'] <= base_date
+        if 'cancelled_at' in reservation:
+            assert reservation['created_at'] <= reservation['cancelled_at'] <= base_date
+
+
+def test_clients_exist_before_their_bookings(tmp_path):
+    output = generate(tmp_path, 'fixtures')
+    clients = {client['client_id']: client for client in read_fixtures(output, 'clients')}
+
+    for reservation in read_fixtures(output, 'reservations'):
+        assert clients[reservation['client_id']]['created_at'] <= reservation['created_at']
+
+
+def test_cancellation_rate_matches_pre_check_in_cancellations(tmp_path):
+    output = tmp_path / 'fixtures'
+    generate_data.main(['--hotels', '20', '--scale', '20', '--cancellation-rate', '0.3', '--output', str(output)])
+    base_date = generate_data.datetime(2025, 1, 1)
+
+    # Stays that ended before the base date are free of the active-stay cut-off
+    finished = [r for r in read_fixtures(output, 'reservations') if r['check_out_date'] <= base_date]
+    cancelled = [r for r in finished if r['cancelled_at'] < r['check_in_date']]
+    checked_out = [r for r in finished if r['cancelled_at'] >= r['check_out_date']]
+
+    assert len(cancelled) + len(checked_out) == len(finished)
+    assert abs(len(cancelled) / len(finished) - 0.3) < 0.03
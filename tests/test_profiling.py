@@ -0,0 +1,78 @@
+import server
+
+
+class FakeRequest:
+    def __init__(self, headers=None, query=None):
+        self.headers = headers or {}
+        self.query_params = query or {}
+
+
+def test_should_profile_requires_token_in_a_header(monkeypatch):
+    monkeypatch.setattr(server, 'PROFILING_ADMIN_TOKEN', 's3cret')
+    monkeypatch.setattr(server, 'PROFILING_SAMPLE_RATE', 0)
+
+    assert server.should_profile(FakeRequest({'X-Profile-Token': 's3cret'}))
+    assert server.should_profile(FakeRequest({'X-Admin-Token': 's3cret'}, {'profile': '1'}))
+    assert not server.should_profile(FakeRequest(query={'profile': '1'}))
+    assert not server.should_profile(FakeRequest({'X-Profile-Token': 'wrong'}))
+    assert not server.should_profile(FakeRequest({'X-Admin-Token': 's3cret'}))
+
+
+def test_should_profile_samples_unflagged_requests(monkeypatch):
+    monkeypatch.setattr(server, 'PROFILING_ADMIN_TOKEN', 's3cret')
+    monkeypatch.setattr(server, 'PROFILING_SAMPLE_RATE', 1)
+
+    assert server.should_profile(FakeRequest())
+
+
+def burn_cpu():
+    return sum(i * i for i in range(20000))
+
+
+class FakeCollection:
+    def __init__(self, **methods):
+        self.__dict__.update(methods)
+
+
+class EmptyCatalog:
+    def get(self, hotel_id):
+        return {}
+
+
+def test_profile_includes_threadpool_endpoint_and_dependency_frames(monkeypatch):
+    from fastapi.testclient import TestClient
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    def find_reservations(query, projection):
+        burn_cpu()
+        return [{'reservation_id': 'x1', 'client_id': 'c1', 'room_id': 'r1'}]
+
+    monkeypatch.setattr(server, 'PROFILING_ADMIN_TOKEN', 's3cret')
+    monkeypatch.setattr(server, 'profile_store', server.ProfileStore(5))
+    monkeypatch.setattr(server, 'room_catalog_cache', EmptyCatalog())
+    monkeypatch.setattr(server, 'workers_collection', FakeCollection(
+        find_one=lambda query: {'worker_id': 'w1', 'hotel_id': 1, 'hotel_name': 'Hotel Test'}
+    ))
+    monkeypatch.setattr(server, 'reservations_collection', FakeCollection(find=find_reservations))
+    monkeypatch.setattr(server, 'clients_collection', FakeCollection(find=lambda query, projection: []))
+
+    client = TestClient(BaseHTTPMiddleware(server.app, dispatch=server.profile_request))
+    response = client.get('/api/reservations', headers={
+        'Authorization': f"Bearer {server.create_token('w1', 1)}",
+        'X-Profile-Token': 's3cret'
+    })
+
+    assert response.status_code == 200
+    profile = server.profile_store.list()[0]
+    stats = server.profile_store.get(profile['profile_id'])['stats']
+    functions = {name for (_, _, name) in stats}
+    assert {'get_reservations', 'verify_token', 'burn_cpu'} <= functions
+    assert profile['thread_profiles'] == 2
+
+
+def test_profile_in_thread_is_a_no_op_outside_a_profile():
+    calls = []
+    wrapped = server.profile_in_thread(lambda: calls.append(1) or 'done')
+
+    assert wrapped() == 'done'
+    assert calls == [1]
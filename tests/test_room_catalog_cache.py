@@ -0,0 +1,180 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+class FakeVersions:
+    """Stand-in for room_catalog_versions shared by every "process" in a test."""
+
+    def __init__(self):
+        self.versions = {}
+
+    def find_one(self, query):
+        version = self.versions.get(query['_id'])
+        return {'_id': query['_id'], 'version': version} if version is not None else None
+
+    def find_one_and_update(self, query, update, upsert, return_document):
+        hotel_id = query['_id']
+        self.versions[hotel_id] = self.versions.get(hotel_id, 0) + update['$inc']['version']
+        return {'_id': hotel_id, 'version': self.versions[hotel_id]}
+
+
+class FakeRooms:
+    def __init__(self, rooms):
+        self.rooms = rooms
+        self.find_calls = 0
+
+    def find(self, query, projection):
+        self.find_calls += 1
+        return [dict(room) for room in self.rooms if room['hotel_id'] == query['hotel_id']]
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    versions = FakeVersions()
+    rooms = FakeRooms([
+        {'room_id': 'r1', 'room_number': '101', 'hotel_id': 1, 'is_available': True},
+        {'room_id': 'r2', 'room_number': '201', 'hotel_id': 1, 'is_available': True},
+    ])
+    monkeypatch.setattr(server, 'room_catalog_versions_collection', versions)
+    monkeypatch.setattr(server, 'rooms_collection', rooms)
+    return versions, rooms
+
+
+def test_second_read_is_a_hit(collections):
+    _, rooms = collections
+    cache = server.RoomCatalogCache(max_hotels=10)
+
+    assert set(cache.get(1)) == {'r1', 'r2'}
+    assert set(cache.get(1)) == {'r1', 'r2'}
+
+    assert rooms.find_calls == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_version_bump_from_another_process_forces_reload(collections):
+    _, rooms = collections
+    cache = server.RoomCatalogCache(max_hotels=10)
+    other_worker = server.RoomCatalogCache(max_hotels=10)
+    cache.get(1)
+
+    rooms.rooms[0]['is_available'] = False
+    other_worker.invalidate(1)
+
+    assert cache.get(1)['r1']['is_available'] is False
+    assert rooms.find_calls == 2
+    assert cache.stats()['misses'] == 2
+
+
+def test_put_room_applies_in_place_when_current(collections):
+    _, rooms = collections
+    cache = server.RoomCatalogCache(max_hotels=10)
+    cache.get(1)
+
+    cache.put_room(1, {'room_id': 'r3', 'room_number': '301', 'hotel_id': 1, 'is_available': True})
+
+    assert 'r3' in cache.get(1)
+    assert rooms.find_calls == 1
+
+
+def test_put_room_drops_entry_when_another_process_wrote_first(collections):
+    _, rooms = collections
+    cache = server.RoomCatalogCache(max_hotels=10)
+    other_worker = server.RoomCatalogCache(max_hotels=10)
+    cache.get(1)
+
+    # Our version is now two behind after our own bump, so the entry can't be patched
+    other_worker.invalidate(1)
+    cache.put_room(1, {'room_id': 'r3', 'room_number': '301', 'hotel_id': 1, 'is_available': True})
+
+    assert cache.stats()['invalidations'] == 1
+    assert cache.stats()['size'] == 0
+    cache.get(1)
+    assert rooms.find_calls == 2
+
+
+def test_least_recently_used_hotel_is_evicted(collections):
+    cache = server.RoomCatalogCache(max_hotels=1)
+    cache.get(1)
+    cache.get(2)
+
+    assert cache.stats()['size'] == 1
+    assert cache.stats()['evictions'] == 1
+
+
+class CountingCollection:
+    """Records every call so tests can count Mongo round trips."""
+
+    def __init__(self, calls, name, handlers):
+        self.calls = calls
+        self.name = name
+        self.handlers = handlers
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            self.calls.append(f"{self.name}.{method}")
+            return self.handlers[method](*args, **kwargs)
+        return call
+
+
+@pytest.fixture
+def reservation_collections(monkeypatch):
+    calls = []
+    room = {'room_id': 'r1', 'room_number': '101', 'hotel_id': 1, 'price_per_night': 50.0, 'is_available': True}
+    versions = FakeVersions()
+
+    def claim(query, update, projection, return_document):
+        if query.get('is_available') and not room['is_available']:
+            return None
+        room.update(update['$set'])
+        return dict(room)
+
+    monkeypatch.setattr(server, 'clients_collection', CountingCollection(calls, 'clients', {
+        'find_one': lambda query: {'client_id': query['client_id'], 'hotel_id': 1}
+    }))
+    monkeypatch.setattr(server, 'rooms_collection', CountingCollection(calls, 'rooms', {
+        'find_one_and_update': claim
+    }))
+    monkeypatch.setattr(server, 'room_catalog_versions_collection', CountingCollection(calls, 'versions', {
+        'find_one_and_update': versions.find_one_and_update
+    }))
+    monkeypatch.setattr(server, 'room_catalog_cache', server.RoomCatalogCache(max_hotels=10))
+    return calls, room
+
+
+def create(reservations, monkeypatch):
+    monkeypatch.setattr(server, 'reservations_collection', reservations)
+    request = server.ReservationCreate(
+        client_id='c1', room_id='r1', check_in_date='2025-01-01', check_out_date='2025-01-03', guests=2
+    )
+    worker = {'hotel_id': 1, 'hotel_name': 'Hotel Test', 'worker_id': 'w1'}
+    return asyncio.run(server.create_reservation(request, worker))
+
+
+def test_create_reservation_makes_four_round_trips(reservation_collections, monkeypatch):
+    calls, room = reservation_collections
+    reservations = CountingCollection(calls, 'reservations', {'insert_one': lambda doc: None})
+
+    result = create(reservations, monkeypatch)
+
+    assert result['total_price'] == 100.0
+    assert room['is_available'] is False
+    assert calls == [
+        'clients.find_one', 'rooms.find_one_and_update',
+        'versions.find_one_and_update', 'reservations.insert_one'
+    ]
+
+
+def test_failed_insert_releases_the_claimed_room(reservation_collections, monkeypatch):
+    _, room = reservation_collections
+
+    def fail(doc):
+        raise RuntimeError('insert failed')
+
+    with pytest.raises(RuntimeError):
+        create(CountingCollection([], 'reservations', {'insert_one': fail}), monkeypatch)
+
+    assert room['is_available'] is True